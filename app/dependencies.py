@@ -5,8 +5,9 @@ from fastapi.security import (
     OAuth2PasswordRequestForm,
     SecurityScopes,
 )
+from psycopg import AsyncConnection
 
-from app.internal import access, auth
+from app.internal import access, auth, db
 from app.internal.clients import AuthenticateResult
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -20,11 +21,11 @@ oauth2_scheme = OAuth2PasswordBearer(
 )  # use token authentication
 
 
-def authorize_client_api(
+async def authorize_client_api(
     security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)]
 ):
     try:
-        client = auth.authorize_token(token, security_scopes.scopes)
+        client = await auth.authorize(token, security_scopes.scopes)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,11 +36,11 @@ def authorize_client_api(
     return client
 
 
-async def try_edit_user(sub: str, admin: auth.client):
+async def try_edit_user(con: AsyncConnection, sub: str, admin: auth.client):
     if (
         sub != admin.clientname
         and not admin.is_chad()
-        and await access.check_access(sub, "admin")
+        and await access.check_access(con, sub, "admin")
     ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -55,8 +56,8 @@ def try_grant_access(admin: auth.client, service: str):
         )
 
 
-async def add_reserved(form: OAuth2PasswordRequestForm):
-    owned_reserved_scopes = await access.get_reserved_access(form.username)
+async def add_reserved(con: AsyncConnection, form: OAuth2PasswordRequestForm):
+    owned_reserved_scopes = await access.get_reserved_access(con, form.username)
     scopes = set(form.scopes).union(owned_reserved_scopes)
     scopes.add("basic")
     form.scopes = list(scopes)
@@ -73,7 +74,7 @@ async def cookie_auth(
             headers={"Location": "/login"},
         )
     try:
-        client = auth.authorize_token(access_token, security_scopes.scopes)
+        client = await auth.authorize(access_token, security_scopes.scopes)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_307_TEMPORARY_REDIRECT,
@@ -84,6 +85,10 @@ async def cookie_auth(
     return client
 
 
+DBDep = Annotated[AsyncConnection, Depends(db.request_connection)]
+WriteDBDep = Annotated[AsyncConnection, Depends(db.request_connection)]
+ReadDBDep = Annotated[AsyncConnection, Depends(db.read_connection)]
+
 StrForm = Annotated[str, Form()]
 BoolForm = Annotated[bool, Form()]
 
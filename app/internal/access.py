@@ -1,63 +1,40 @@
+from psycopg import AsyncConnection
 from pydantic import BaseModel
-from app.internal.db import apc, filterize
+from app.internal.db import PAGE_SIZE, filterize
+from app.internal.queries import queries
 
 RESERVED_SCOPES = ["admin", "CHAD"]
 
 
-async def create_access(client: str, scope: str):
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            INSERT INTO access
-            VALUES(%(clientname)s, %(scopename)s)
-            """,
-            {"clientname": client, "scopename": scope},
-        )
-
-
-async def check_access(client: str, scope: str) -> bool:
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            SELECT EXISTS (
-                SELECT 1
-                FROM access
-                WHERE clientname = %(clientname)s
-                    AND scopename = %(scopename)s
-            )
-            """,
-            {"clientname": client, "scopename": scope},
-        )
-        res = await c.fetchone()
-        return res is not None
-
-
-async def read_access(client: str) -> list[str]:
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            SELECT scopename
-            FROM access
-            WHERE clientname = %(clientname)s
-            """,
-            {"clientname": client},
-        )
-        scopes = await c.fetchall()
+async def create_access(con: AsyncConnection, client: str, scope: str):
+    await queries.create_access(con, clientname=client, scopename=scope)
+
+
+async def check_access(con: AsyncConnection, client: str, scope: str) -> bool:
+    return await queries.check_access(con, clientname=client, scopename=scope)
+
+
+async def read_access(con: AsyncConnection, client: str) -> list[str]:
+    scopes = await queries.read_access(con, clientname=client)
     return [scope[0] for scope in scopes]
 
 
-async def get_reserved_access(client: str) -> list[str]:
-    has_scopes = await read_access(client)
+async def get_reserved_access(con: AsyncConnection, client: str) -> list[str]:
+    has_scopes = await read_access(con, client)
     return list(set(RESERVED_SCOPES).intersection(has_scopes))
 
 
-async def has_all_scopes(client: str, scopes_req: list[str]) -> bool:
-    has_scopes = await read_access(client)
+async def has_all_scopes(
+    con: AsyncConnection, client: str, scopes_req: list[str]
+) -> bool:
+    has_scopes = await read_access(con, client)
     return all(scope in has_scopes for scope in scopes_req)
 
 
-async def has_any_scopes(client: str, scopes_req: list[str]) -> bool:
-    has_scopes = await read_access(client)
+async def has_any_scopes(
+    con: AsyncConnection, client: str, scopes_req: list[str]
+) -> bool:
+    has_scopes = await read_access(con, client)
     return any(scope in has_scopes for scope in scopes_req)
 
 
@@ -66,36 +43,50 @@ class AccessList(BaseModel):
     clients: list[str]
 
 
-async def filter_access(client: str, scope: str) -> AccessList:
+async def filter_access(con: AsyncConnection, client: str, scope: str) -> AccessList:
     client = filterize(client)
     scope = filterize(scope)
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            SELECT scopename, clientname
-            FROM access
-            WHERE LOWER(clientname) LIKE %(client)s
-                AND LOWER(scopename) LIKE %(scope)s
-            LIMIT 30
-            """,
-            {"client": client, "scope": scope},
-        )
-        res = await c.fetchall()
+    res = await queries.filter_access(con, client=client, scope=scope)
     if len(res) == 0:
         return AccessList(scopes=[], clients=[])
     scopes, clients = zip(*res)
     return AccessList(scopes=scopes, clients=clients)
 
 
-async def delete_access(client: str, scope: str):
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            DELETE FROM access
-            WHERE clientname = %(clientname)s
-                AND scopename = %(scopename)s
-            """,
-            {"clientname": client, "scopename": scope},
-        )
-        if c.rowcount == 0:
-            raise Exception(f"{client}'s access to {scope} not found!")
+class AccessRow(BaseModel):
+    client: str
+    scope: str
+
+
+class AccessPage(BaseModel):
+    access: list[AccessRow]
+    after_client: str | None
+    after_scope: str | None
+
+
+async def page_access(
+    con: AsyncConnection, client: str, after_client: str, after_scope: str
+) -> AccessPage:
+    """
+    Keyset pagination on (clientname, scopename),
+    after_* is the last row of the previous page
+    """
+    rows = await queries.page_access(
+        con,
+        client=filterize(client),
+        after_client=after_client,
+        after_scope=after_scope,
+        limit=PAGE_SIZE + 1,
+    )
+    access = [AccessRow(client=client, scope=scope) for client, scope in rows]
+    if len(access) <= PAGE_SIZE:
+        return AccessPage(access=access, after_client=None, after_scope=None)
+    access = access[:PAGE_SIZE]
+    last = access[-1]
+    return AccessPage(access=access, after_client=last.client, after_scope=last.scope)
+
+
+async def delete_access(con: AsyncConnection, client: str, scope: str):
+    rowcount = await queries.delete_access(con, clientname=client, scopename=scope)
+    if rowcount == 0:
+        raise Exception(f"{client}'s access to {scope} not found!")
@@ -0,0 +1,276 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from enum import Enum
+import logging
+import os
+from time import monotonic
+from psycopg import AsyncConnection, OperationalError
+from psycopg.rows import class_row
+from psycopg_pool import PoolTimeout
+from pydantic import BaseModel
+from app.internal import db
+from app.internal.db import filterize
+from app.internal.queries import queries
+
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", 10000))
+AUDIT_CHANGES_QUEUE_SIZE = int(os.environ.get("AUDIT_CHANGES_QUEUE_SIZE", 10000))
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_SECONDS = 1.0
+# the flusher doesn't wait out the pool's 30s timeout while the database is down
+AUDIT_CONNECT_SECONDS = 2.0
+# stop() gives up draining after this, under gunicorn's graceful_timeout
+AUDIT_STOP_SECONDS = 20.0
+# actor and subject come from unauthenticated login forms
+AUDIT_FIELD_LENGTH = 256
+
+logger = logging.getLogger(__name__)
+
+
+class Action(Enum):
+    LOGIN = 0
+    CREATE_CLIENT = 1
+    SET_DISABLED = 2
+    RESET_KEY = 3
+    DELETE_CLIENT = 4
+    CREATE_SCOPE = 5
+    DELETE_SCOPE = 6
+    GRANT_ACCESS = 7
+    REVOKE_ACCESS = 8
+
+
+class AuditEntry(BaseModel):
+    at: datetime
+    actor: str
+    action: str
+    subject: str
+    detail: str
+
+
+class AuditStats(BaseModel):
+    queued: int = 0
+    flushed: int = 0
+    dropped: int = 0
+    dropped_changes: int = 0
+    requeued: int = 0
+    failed: int = 0
+    batches: int = 0
+
+
+# Both queues are bounded so a login flood or a down database can't grow memory
+# without limit, once full new entries are dropped and counted instead of
+# blocking requests. Admin changes have their own queue so logins can't push
+# them out, and are flushed first.
+# Batches the database can't take are requeued until stop() gives up.
+logins: deque[AuditEntry] = deque()
+changes: deque[AuditEntry] = deque()
+pending = asyncio.Event()
+stats = AuditStats()
+stopping = False
+flusher: asyncio.Task | None = None
+
+
+def queued() -> int:
+    return len(changes) + len(logins)
+
+
+def entry_queue(entry: AuditEntry) -> tuple[deque[AuditEntry], int]:
+    if entry.action == Action.LOGIN.name:
+        return logins, AUDIT_QUEUE_SIZE
+    return changes, AUDIT_CHANGES_QUEUE_SIZE
+
+
+def drop(entry: AuditEntry):
+    if entry.action == Action.LOGIN.name:
+        stats.dropped += 1
+        return
+    stats.dropped_changes += 1
+    logger.error("Dropped audit entry %s", entry.model_dump_json())
+
+
+def record(actor: str, action: Action, subject: str, detail: str = ""):
+    entry = AuditEntry(
+        at=datetime.now(tz=timezone.utc),
+        actor=actor[:AUDIT_FIELD_LENGTH],
+        action=action.name,
+        subject=subject[:AUDIT_FIELD_LENGTH],
+        detail=detail[:AUDIT_FIELD_LENGTH],
+    )
+    entries, limit = entry_queue(entry)
+    if len(entries) >= limit:
+        drop(entry)
+        return
+    entries.append(entry)
+    stats.queued += 1
+    pending.set()
+
+
+def requeue(batch: list[AuditEntry]):
+    """
+    Puts a batch back at the front of its queues, in order
+    """
+    for entry in reversed(batch):
+        entries, limit = entry_queue(entry)
+        if len(entries) >= limit:
+            drop(entry)
+            continue
+        entries.appendleft(entry)
+        stats.requeued += 1
+
+
+async def next_batch() -> list[AuditEntry]:
+    """
+    Waits until AUDIT_BATCH_SIZE entries are queued or AUDIT_FLUSH_SECONDS pass,
+    whichever comes first. Doesn't wait once stopping
+    """
+    deadline = monotonic() + AUDIT_FLUSH_SECONDS
+    while not stopping and queued() < AUDIT_BATCH_SIZE:
+        timeout = deadline - monotonic()
+        if timeout <= 0:
+            break
+        pending.clear()
+        try:
+            await asyncio.wait_for(pending.wait(), timeout)
+        except asyncio.TimeoutError:
+            break
+
+    batch: list[AuditEntry] = []
+    for entries in (changes, logins):
+        while entries and len(batch) < AUDIT_BATCH_SIZE:
+            batch.append(entries.popleft())
+    return batch
+
+
+async def copy_batch(batch: list[AuditEntry]):
+    async with db.pool.connection(timeout=AUDIT_CONNECT_SECONDS) as con:
+        async with con.cursor() as c:
+            async with c.copy(queries.copy_audit.sql) as copy:
+                for entry in batch:
+                    await copy.write_row(
+                        (
+                            entry.at,
+                            entry.actor,
+                            entry.action,
+                            entry.subject,
+                            entry.detail,
+                        )
+                    )
+
+
+async def insert_rows(batch: list[AuditEntry]) -> int:
+    """
+    One savepoint per entry so a bad entry only loses itself,
+    returns how many were inserted
+    """
+    inserted = 0
+    async with db.pool.connection(timeout=AUDIT_CONNECT_SECONDS) as con:
+        for entry in batch:
+            try:
+                async with con.transaction():
+                    await queries.insert_audit(con, **entry.model_dump())
+            except OperationalError:
+                raise
+            except Exception:
+                logger.exception("Dropped audit entry %s", entry.model_dump_json())
+                continue
+            inserted += 1
+    return inserted
+
+
+async def flush(batch: list[AuditEntry]) -> bool:
+    """
+    COPY the whole batch, if that fails retry it row by row.
+    False if the database is unreachable, the batch is requeued
+    """
+    try:
+        await copy_batch(batch)
+    except (PoolTimeout, OperationalError):
+        logger.warning("Database unavailable, requeued %d audit entries", len(batch))
+        requeue(batch)
+        return False
+    except Exception:
+        logger.exception("Audit COPY of %d entries failed, inserting rows", len(batch))
+    else:
+        stats.flushed += len(batch)
+        stats.batches += 1
+        return True
+
+    try:
+        inserted = await insert_rows(batch)
+    except (PoolTimeout, OperationalError):
+        logger.warning("Database unavailable, requeued %d audit entries", len(batch))
+        requeue(batch)
+        return False
+    stats.flushed += inserted
+    stats.failed += len(batch) - inserted
+    return True
+
+
+async def flush_forever():
+    while not stopping or queued() != 0:
+        batch = await next_batch()
+        if len(batch) == 0:
+            continue
+        try:
+            flushed = await flush(batch)
+        except asyncio.CancelledError:
+            requeue(batch)
+            raise
+        if not flushed:
+            await asyncio.sleep(AUDIT_FLUSH_SECONDS)
+
+
+def start():
+    global flusher, stopping
+    stopping = False
+    flusher = asyncio.create_task(flush_forever())
+
+
+async def stop():
+    """
+    Drains whatever is still queued, call before closing the pool.
+    Gives up after AUDIT_STOP_SECONDS, what's left is dropped and counted
+    """
+    global stopping
+    stopping = True
+    pending.set()
+    if flusher is None:
+        return
+    done, _ = await asyncio.wait({flusher}, timeout=AUDIT_STOP_SECONDS)
+    if flusher in done:
+        return
+    flusher.cancel()
+    try:
+        await flusher
+    except asyncio.CancelledError:
+        pass
+    logger.error("Audit drain timed out with %d entries queued", queued())
+    for entries in (changes, logins):
+        while entries:
+            drop(entries.popleft())
+
+
+async def stream_audit(
+    con: AsyncConnection,
+    actor: str,
+    action: str,
+    subject: str,
+    since: datetime,
+    limit: int,
+):
+    """
+    Newline delimited JSON, rows come from a server side cursor
+    so large ranges are never held in memory at once
+    """
+    params = {
+        "actor": filterize(actor),
+        "action": filterize(action),
+        "subject": filterize(subject),
+        "since": since,
+        "limit": limit,
+    }
+    row_factory = class_row(AuditEntry)
+    async with con.cursor(name="audit_stream", row_factory=row_factory) as c:
+        await c.execute(queries.filter_audit.sql, params)
+        async for entry in c:
+            yield entry.model_dump_json() + "\n"
@@ -2,11 +2,14 @@ from enum import Enum
 from cryptography.hazmat.primitives import serialization
 from datetime import datetime, timedelta, timezone
 import os
+from time import perf_counter
 from fastapi.security import OAuth2PasswordRequestForm
 import jwt
+from psycopg import AsyncConnection
 from pydantic import BaseModel
+from app.internal import audit, scope_index, token_cache
 from app.internal.access import has_all_scopes
-from app.internal.clients import AuthenticateResult, authenticate_client
+from app.internal.clients import AuthenticateResult, authenticate_client, hasher
 
 
 class Runtime(Enum):
@@ -17,6 +20,9 @@ class Runtime(Enum):
 
 private_key: bytes
 public_key: bytes
+keys_loaded_at: datetime | None = None
+keys_load_seconds: float | None = None
+warmup_seconds: float | None = None
 
 
 TOKEN_LIFETIME_MINUTES = 30
@@ -64,31 +70,80 @@ def update_public_key():
     public_key = optional_public_key
 
 
-def create_token(client: str, scopes: list[str]):
+def update_keys():
+    global keys_loaded_at, keys_load_seconds
+    started = perf_counter()
+    update_private_key()
+    update_public_key()
+    keys_load_seconds = perf_counter() - started
+    keys_loaded_at = datetime.now(tz=timezone.utc)
+    token_cache.clear()
+
+
+def create_token(client: str, scopes: list[str], compact: bool = False):
+    """
+    compact tokens carry a compressed bitset of scope.idx bits in "scp"
+    instead of the scope names in "aud", the "sv" header is the scope index version
+    """
     expires = datetime.now(tz=timezone.utc) + timedelta(minutes=TOKEN_LIFETIME_MINUTES)
-    payload = {"sub": client, "iss": AUTH_ISSUER, "aud": scopes, "exp": expires}
-    return jwt.encode(payload, private_key, algorithm="RS256")
+    payload = {"sub": client, "iss": AUTH_ISSUER, "exp": expires}
+    if not compact:
+        payload["aud"] = scopes
+        return jwt.encode(payload, private_key, algorithm="RS256")
 
+    payload["scp"] = scope_index.encode_scopes(scopes)
+    headers = {"sv": scope_index.version}
+    return jwt.encode(payload, private_key, algorithm="RS256", headers=headers)
 
-async def login(form: OAuth2PasswordRequestForm):
+
+async def login(
+    con: AsyncConnection, form: OAuth2PasswordRequestForm, compact: bool = False
+):
     """
     Performs authentication + token creation
     Conforms to OAuth2 RFC
     RS256 for central auth scope
     """
 
-    authentication_res = await authenticate_client(form.username, form.password)
+    authentication_res = await authenticate_client(con, form.username, form.password)
+    if authentication_res == AuthenticateResult.SUCCESS and not await has_all_scopes(
+        con, form.username, form.scopes
+    ):
+        authentication_res = AuthenticateResult.NOT_AUTHORIZED
+
+    audit.record(
+        form.username, audit.Action.LOGIN, form.username, authentication_res.name
+    )
     if authentication_res != AuthenticateResult.SUCCESS:
         return authentication_res
 
-    has_scopes = await has_all_scopes(form.username, form.scopes)
-    if not has_scopes:
-        return AuthenticateResult.NOT_AUTHORIZED
+    if compact and scope_index.scope_mask(form.scopes) is None:
+        await scope_index.update_scope_index(con)
+
+    token = token_cache.get_token(form.username, form.scopes, compact)
+    if token is not None:
+        return token
 
-    token = create_token(form.username, form.scopes)
+    token = create_token(form.username, form.scopes, compact)
+    token_cache.put_token(
+        form.username, form.scopes, compact, token, TOKEN_LIFETIME_SECONDS
+    )
     return token
 
 
+def warmup():
+    """
+    Runs the RS256 sign + verify and bcrypt paths once,
+    so the first real requests don't pay for their first use
+    """
+    global warmup_seconds
+    started = perf_counter()
+    token = create_token("warmup", ["warmup"])
+    authorize_token(token, ["warmup"])
+    hasher.dummy_verify()
+    warmup_seconds = perf_counter() - started
+
+
 class client(BaseModel):
     clientname: str
     scopes: list[str]
@@ -105,10 +160,12 @@ class client(BaseModel):
 
 def authorize_token(token: str, scopes: list[str]):
     """
-    Other scopes can reuse this logic for authorization.
+    Other services can reuse this logic offline with wolfeyauth.Verifier.
     This follows standard OAuth2 RFC
     """
     token_bytes = bytes(token, encoding="utf-8")
+    if "sv" in jwt.get_unverified_header(token_bytes):
+        return authorize_compact_token(token_bytes, scopes)
     payload = jwt.decode(
         token_bytes,
         public_key,
@@ -119,3 +176,41 @@ def authorize_token(token: str, scopes: list[str]):
     )
 
     return client(clientname=payload.get("sub"), scopes=payload.get("aud"))
+
+
+async def authorize(token: str, scopes: list[str]):
+    """
+    authorize_token for the request dependencies. A compact token signed by
+    another worker can carry a newer "sv" than this worker's scope index,
+    the index catches up once the token's signature has checked out
+    """
+    token_bytes = bytes(token, encoding="utf-8")
+    sv = jwt.get_unverified_header(token_bytes).get("sv")
+    if sv is None:
+        return authorize_token(token, scopes)
+    payload = decode_compact_token(token_bytes)
+    if sv > scope_index.version:
+        await scope_index.refresh_scope_index(sv)
+    return compact_client(payload, scopes)
+
+
+def decode_compact_token(token_bytes: bytes) -> dict:
+    return jwt.decode(
+        token_bytes,
+        public_key,
+        issuer=AUTH_ISSUER,
+        algorithms=["RS256"],
+        options={"require": ["exp", "iss", "sub", "scp"]},
+    )
+
+
+def compact_client(payload: dict, scopes: list[str]):
+    mask = scope_index.decode_mask(payload["scp"])
+    if not scope_index.has_any_bit(mask, scopes):
+        raise Exception("Token is missing a required scope")
+
+    return client(clientname=payload["sub"], scopes=scope_index.mask_scopes(mask))
+
+
+def authorize_compact_token(token_bytes: bytes, scopes: list[str]):
+    return compact_client(decode_compact_token(token_bytes), scopes)
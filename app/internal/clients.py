@@ -1,8 +1,9 @@
 from enum import Enum
 from secrets import token_hex
+from psycopg import AsyncConnection
 from pydantic import BaseModel
-from app.internal.db import apc, filterize
-from psycopg.rows import class_row
+from app.internal.db import PAGE_SIZE, filterize
+from app.internal.queries import queries
 from passlib.context import CryptContext
 
 hasher = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -14,32 +15,19 @@ class DBclient(BaseModel):
     disabled: bool
 
 
-async def create_client(name: str):
+async def create_client(con: AsyncConnection, name: str):
     key = token_hex(32)
     hashedkey = hasher.hash(key)
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            INSERT INTO client
-            VALUES (%(name)s, %(hashedkey)s, DEFAULT)
-            """,
-            {"name": name, "hashedkey": hashedkey},
-        )
+    await queries.create_client(con, name=name, hashedkey=hashedkey)
     return key
 
 
-async def read_client(name: str) -> DBclient | None:
-    async with apc() as c:
-        c.row_factory = class_row(DBclient)
-        await c.execute(
-            """--sql
-            SELECT name, hashedkey, disabled
-            FROM client
-            WHERE name = %(name)s
-            """,
-            {"name": name},
-        )
-        return await c.fetchone()
+async def read_client(con: AsyncConnection, name: str) -> DBclient | None:
+    res = await queries.read_client(con, name=name)
+    if res is None:
+        return None
+    name, hashedkey, disabled = res
+    return DBclient(name=name, hashedkey=hashedkey, disabled=disabled)
 
 
 class AuthenticateResult(Enum):
@@ -50,8 +38,8 @@ class AuthenticateResult(Enum):
     NOT_AUTHORIZED = 4
 
 
-async def authenticate_client(name: str, key: str):
-    client = await read_client(name)
+async def authenticate_client(con: AsyncConnection, name: str, key: str):
+    client = await read_client(con, name)
     if client is None:
         return AuthenticateResult.client_NOT_FOUND
     if client.disabled:
@@ -61,60 +49,50 @@ async def authenticate_client(name: str, key: str):
     return AuthenticateResult.SUCCESS
 
 
-async def filter_clients(name: str, disabled: bool) -> list[str]:
+async def filter_clients(con: AsyncConnection, name: str, disabled: bool) -> list[str]:
     name = filterize(name)
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            SELECT name
-            FROM client
-            WHERE LOWER(name) LIKE %(name)s
-            AND disabled = %(disabled)s
-            LIMIT 30
-            """,
-            {"name": name, "disabled": disabled},
-        )
-        clients = await c.fetchall()
+    clients = await queries.filter_clients(con, name=name, disabled=disabled)
     return [client[0] for client in clients]
 
 
-async def set_disabled_client(name: str, disabled: bool):
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            UPDATE client
-            SET disabled = %(disabled)s
-            WHERE name = %(name)s
-            """,
-            {"name": name, "disabled": disabled},
-        )
-        if c.rowcount == 0:
-            raise Exception(f"{name} not found!")
+class ClientRow(BaseModel):
+    name: str
+    disabled: bool
+
+
+class ClientPage(BaseModel):
+    clients: list[ClientRow]
+    after: str | None
+
+
+async def page_clients(con: AsyncConnection, name: str, after: str) -> ClientPage:
+    """
+    Keyset pagination on name, after is the last name of the previous page
+    """
+    rows = await queries.page_clients(
+        con, name=filterize(name), after=after, limit=PAGE_SIZE + 1
+    )
+    clients = [ClientRow(name=name, disabled=disabled) for name, disabled in rows]
+    if len(clients) <= PAGE_SIZE:
+        return ClientPage(clients=clients, after=None)
+    clients = clients[:PAGE_SIZE]
+    return ClientPage(clients=clients, after=clients[-1].name)
+
+
+async def set_disabled_client(con: AsyncConnection, name: str, disabled: bool):
+    rowcount = await queries.update_disabled(con, name=name, disabled=disabled)
+    if rowcount == 0:
+        raise Exception(f"{name} not found!")
 
 
-async def reset_client_key(name: str) -> str:
+async def reset_client_key(con: AsyncConnection, name: str) -> str:
     key = token_hex(32)
     hashedkey = hasher.hash(key)
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            UPDATE client
-            SET hashedkey = %(hashedkey)s
-            WHERE name = %(name)s
-            """,
-            {"name": name, "hashedkey": hashedkey},
-        )
+    await queries.update_hashedkey(con, name=name, hashedkey=hashedkey)
     return key
 
 
-async def delete_client(name: str):
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            DELETE FROM client
-            WHERE name = %(name)s
-            """,
-            {"name": name},
-        )
-        if c.rowcount == 0:
-            raise Exception(f"{name} not found!")
+async def delete_client(con: AsyncConnection, name: str):
+    rowcount = await queries.delete_client(con, name=name)
+    if rowcount == 0:
+        raise Exception(f"{name} not found!")
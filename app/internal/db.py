@@ -1,19 +1,140 @@
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack
 import os
-from psycopg_pool import AsyncConnectionPool
+import re
+from time import monotonic
+from typing import Annotated
+from fastapi import Cookie, Response
+from psycopg import AsyncConnection, OperationalError
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from app.internal.queries import queries
 
 DB_URL = os.environ["DATABASE_URL"]
-pool = AsyncConnectionPool(DB_URL, open=False)
+REPLICA_DB_URL = os.environ.get("REPLICA_DATABASE_URL")
+# how long a client's reads wait for the replica to replay its last write,
+# past this the replica is trusted again
+READ_YOUR_WRITES_SECONDS = int(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
+REPLICA_TIMEOUT_SECONDS = float(os.environ.get("REPLICA_TIMEOUT_SECONDS", 0.5))
+REPLICA_RETRY_SECONDS = 30
 
+# WAL position of the client's last committed write
+READ_AFTER_COOKIE = "read_after"
+LSN_PATTERN = re.compile(r"[0-9A-F]{1,8}/[0-9A-F]{1,8}")
 
-@asynccontextmanager
-async def apc():
+# per process, gunicorn.conf.py splits DB_MAX_CONNECTIONS between its workers
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 8))
+POOL_MIN_SIZE = min(int(os.environ.get("DB_POOL_MIN_SIZE", 2)), POOL_MAX_SIZE)
+
+
+def new_pool(url: str) -> AsyncConnectionPool:
+    return AsyncConnectionPool(
+        url, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, open=False
+    )
+
+
+pool = new_pool(DB_URL)
+replica_pool = None if REPLICA_DB_URL is None else new_pool(REPLICA_DB_URL)
+
+pool_open_seconds: float | None = None
+replica_down_until = float("-inf")
+
+
+async def request_connection():
     """
-    Async Pool Cursor
+    Unit of work, one checkout + one transaction per request.
+    Handlers that write must await commit() before they return,
+    FastAPI 0.103 only runs the code after yield once the response is sent.
+    Rolls back if the handler raises
     """
     async with pool.connection() as con:
-        async with con.cursor() as cur:
-            yield cur
+        yield con
+
+
+async def commit(con: AsyncConnection, response: Response):
+    """
+    With a replica configured, also hands the client the commit's WAL position
+    so its next reads only use the replica once it has replayed the write.
+    The position travels in a cookie, so it follows the client across workers
+    """
+    await con.commit()
+    if replica_pool is None:
+        return
+    lsn = await queries.current_wal_lsn(con)
+    response.set_cookie(
+        key=READ_AFTER_COOKIE,
+        value=lsn,
+        max_age=READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        samesite="strict",
+    )
+
+
+def use_replica() -> bool:
+    return replica_pool is not None and monotonic() >= replica_down_until
+
+
+async def enter_replica(
+    stack: AsyncExitStack, read_after: str | None
+) -> AsyncConnection | None:
+    """
+    None if the replica is unreachable or hasn't replayed read_after yet.
+    The replay check runs on every checkout, it doubles as a liveness check
+    since psycopg_pool doesn't test connections it hands out
+    """
+    global replica_down_until
+    if replica_pool is None or not use_replica():
+        return None
+    if read_after is not None and not LSN_PATTERN.fullmatch(read_after):
+        read_after = None
+    try:
+        async with AsyncExitStack() as replica_stack:
+            con = await replica_stack.enter_async_context(
+                replica_pool.connection(timeout=REPLICA_TIMEOUT_SECONDS)
+            )
+            if not await queries.replayed_lsn(con, lsn=read_after):
+                return None
+            stack.push_async_exit(replica_stack.pop_all())
+            return con
+    except (PoolTimeout, OperationalError):
+        replica_down_until = monotonic() + REPLICA_RETRY_SECONDS
+        return None
+
+
+async def read_connection(
+    read_after: Annotated[str | None, Cookie(alias=READ_AFTER_COOKIE)] = None,
+):
+    """
+    request_connection for reads, routed to the replica when it is
+    configured, reachable and caught up with this client's writes
+    """
+    async with AsyncExitStack() as stack:
+        con = await enter_replica(stack, read_after)
+        if con is None:
+            con = await stack.enter_async_context(pool.connection())
+        yield con
+
+
+async def open_pools():
+    """
+    Waits for the primary pool to reach min_size,
+    the replica is optional so it fills in the background
+    """
+    global pool_open_seconds
+    started = monotonic()
+    await pool.open(wait=True)
+    pool_open_seconds = monotonic() - started
+    if replica_pool is not None:
+        await replica_pool.open()
+
+
+async def close_pools():
+    global pool_open_seconds
+    pool_open_seconds = None
+    if replica_pool is not None:
+        await replica_pool.close()
+    await pool.close()
+
+
+PAGE_SIZE = 50
 
 
 def filterize(to_filterize: str):
@@ -0,0 +1,63 @@
+from datetime import datetime
+from psycopg_pool import AsyncConnectionPool
+from pydantic import BaseModel
+from app.internal import auth, db
+
+
+class PoolStats(BaseModel):
+    min_size: int
+    size: int
+    available: int
+    requests_waiting: int
+
+
+class Readiness(BaseModel):
+    ready: bool
+    database: bool
+    pool: PoolStats
+    pool_open_seconds: float | None
+    replica_pool: PoolStats | None
+    keys_loaded_at: datetime | None
+    keys_load_seconds: float | None
+    warmup_seconds: float | None
+
+
+def pool_stats(pool: AsyncConnectionPool) -> PoolStats:
+    stats = pool.get_stats()
+    return PoolStats(
+        min_size=stats["pool_min"],
+        size=stats["pool_size"],
+        available=stats["pool_available"],
+        requests_waiting=stats["requests_waiting"],
+    )
+
+
+def pool_filled(pool: AsyncConnectionPool) -> bool:
+    """
+    Read from the pool's stats, so a probe on a busy pod never queues for a
+    connection. Size only drops below min_size once the pool gives up on
+    reconnecting, after its reconnect_timeout
+    """
+    stats = pool.get_stats()
+    return stats["pool_size"] >= stats["pool_min"]
+
+
+async def readiness() -> Readiness:
+    """
+    Ready once the pool has been filled to min_size, the keys are loaded
+    and the RS256 + bcrypt paths are warm
+    """
+    database = db.pool_open_seconds is not None and pool_filled(db.pool)
+    replica_pool = db.replica_pool
+    return Readiness(
+        ready=database
+        and auth.keys_loaded_at is not None
+        and auth.warmup_seconds is not None,
+        database=database,
+        pool=pool_stats(db.pool),
+        pool_open_seconds=db.pool_open_seconds,
+        replica_pool=None if replica_pool is None else pool_stats(replica_pool),
+        keys_loaded_at=auth.keys_loaded_at,
+        keys_load_seconds=auth.keys_load_seconds,
+        warmup_seconds=auth.warmup_seconds,
+    )
@@ -0,0 +1,94 @@
+from contextlib import asynccontextmanager
+from time import perf_counter
+import aiosql
+from aiosql.adapters.pyformat import PyFormatAdapter
+from psycopg import AsyncConnection
+from pydantic import BaseModel
+
+QUERIES_PATH = "queries"
+
+
+class QueryStats(BaseModel):
+    calls: int = 0
+    seconds: float = 0
+
+
+stats: dict[str, QueryStats] = {}
+
+
+def record(query_name: str, started: float):
+    query_stats = stats.get(query_name)
+    if query_stats is None:
+        query_stats = stats[query_name] = QueryStats()
+    query_stats.calls += 1
+    query_stats.seconds += perf_counter() - started
+
+
+class AsyncPsycopgAdapter(PyFormatAdapter):
+    """
+    aiosql adapter for psycopg's AsyncConnection.
+    Every query runs as a server side prepared statement,
+    psycopg keeps it prepared on each pooled connection
+    """
+
+    is_aio_driver = True
+
+    async def select(
+        self, conn: AsyncConnection, query_name, sql, parameters, record_class=None
+    ):
+        started = perf_counter()
+        c = await conn.execute(sql, parameters, prepare=True)
+        res = await c.fetchall()
+        record(query_name, started)
+        return res
+
+    async def select_one(
+        self, conn: AsyncConnection, query_name, sql, parameters, record_class=None
+    ):
+        started = perf_counter()
+        c = await conn.execute(sql, parameters, prepare=True)
+        res = await c.fetchone()
+        record(query_name, started)
+        return res
+
+    async def select_value(self, conn: AsyncConnection, query_name, sql, parameters):
+        res = await self.select_one(conn, query_name, sql, parameters)
+        return None if res is None else res[0]
+
+    @asynccontextmanager
+    async def select_cursor(self, conn: AsyncConnection, query_name, sql, parameters):
+        started = perf_counter()
+        async with conn.cursor() as c:
+            await c.execute(sql, parameters, prepare=True)
+            yield c
+        record(query_name, started)
+
+    async def insert_update_delete(
+        self, conn: AsyncConnection, query_name, sql, parameters
+    ) -> int:
+        started = perf_counter()
+        c = await conn.execute(sql, parameters, prepare=True)
+        record(query_name, started)
+        return c.rowcount
+
+    async def insert_update_delete_many(
+        self, conn: AsyncConnection, query_name, sql, parameters
+    ) -> int:
+        started = perf_counter()
+        async with conn.cursor() as c:
+            await c.executemany(sql, parameters)
+            record(query_name, started)
+            return c.rowcount
+
+    async def insert_returning(
+        self, conn: AsyncConnection, query_name, sql, parameters
+    ):
+        res = await self.select_one(conn, query_name, sql, parameters)
+        return res[0] if res is not None and len(res) == 1 else res
+
+    async def execute_script(self, conn: AsyncConnection, sql):
+        c = await conn.execute(sql)
+        return c.statusmessage
+
+
+queries = aiosql.from_path(QUERIES_PATH, AsyncPsycopgAdapter)
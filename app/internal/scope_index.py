@@ -0,0 +1,119 @@
+import asyncio
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from time import monotonic
+import zlib
+from psycopg import AsyncConnection
+from pydantic import BaseModel
+from app.internal import db
+from app.internal.queries import queries
+
+# each worker has its own copy, scopes created through another worker show up
+# once a token or verifier asks for a newer version, or after the TTL
+SCOPE_INDEX_TTL_SECONDS = 60
+# a forged "sv" header can't make every request read the table
+SCOPE_INDEX_MIN_REFRESH_SECONDS = 0.5
+
+# scope.idx is a SERIAL that is never reused, so a scope's bit never moves.
+# version comes from scope_index_version, bumped in the same transaction
+# as every scope insert and delete, so it only goes up.
+scope_bits: dict[str, int] = {}
+bit_scopes: dict[int, str] = {}
+version = 0
+refreshed_at = float("-inf")
+refresh_lock = asyncio.Lock()
+
+
+class ScopeIndex(BaseModel):
+    version: int
+    scopes: dict[int, str]
+
+
+async def read_scope_index(con: AsyncConnection) -> list[tuple[int, int, str]]:
+    return await queries.read_scope_index(con)
+
+
+async def bump_version(con: AsyncConnection):
+    await queries.bump_scope_index_version(con)
+
+
+async def update_scope_index(con: AsyncConnection):
+    global scope_bits, bit_scopes, version, refreshed_at
+    rows = await read_scope_index(con)
+    scope_bits = {name: idx for _, idx, name in rows if idx is not None}
+    bit_scopes = {idx: name for name, idx in scope_bits.items()}
+    version = rows[0][0]
+    refreshed_at = monotonic()
+
+
+def is_stale(min_version: int) -> bool:
+    age = monotonic() - refreshed_at
+    if version < min_version:
+        return age >= SCOPE_INDEX_MIN_REFRESH_SECONDS
+    return age >= SCOPE_INDEX_TTL_SECONDS
+
+
+async def refresh_scope_index(min_version: int = 0):
+    """
+    Rereads the index from the primary if it is older than min_version or the TTL,
+    concurrent callers share one read
+    """
+    if not is_stale(min_version):
+        return
+    async with refresh_lock:
+        if not is_stale(min_version):
+            return
+        async with db.pool.connection() as con:
+            await update_scope_index(con)
+
+
+def get_scope_index() -> ScopeIndex:
+    return ScopeIndex(version=version, scopes=bit_scopes)
+
+
+def scope_mask(scopes: list[str]) -> int | None:
+    """
+    None if any of the scopes are missing from the index
+    """
+    mask = 0
+    for scope in scopes:
+        bit = scope_bits.get(scope)
+        if bit is None:
+            return None
+        mask |= 1 << bit
+    return mask
+
+
+def encode_scopes(scopes: list[str]) -> str:
+    mask = scope_mask(scopes)
+    if mask is None:
+        raise Exception("Scope index is missing a requested scope!")
+    bitset = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    return urlsafe_b64encode(zlib.compress(bitset, 9)).decode().rstrip("=")
+
+
+def decode_mask(encoded: str) -> int:
+    padded = encoded + "=" * (-len(encoded) % 4)
+    return int.from_bytes(zlib.decompress(urlsafe_b64decode(padded)), "little")
+
+
+def has_any_bit(mask: int, scopes: list[str]) -> bool:
+    """
+    Same rule as PyJWT's "aud" check on list tokens,
+    any one of the scopes is enough and an empty list never passes
+    """
+    for scope in scopes:
+        bit = scope_bits.get(scope)
+        if bit is not None and mask >> bit & 1:
+            return True
+    return False
+
+
+def mask_scopes(mask: int) -> list[str]:
+    scopes = []
+    while mask:
+        bit = mask.bit_length() - 1
+        scope = bit_scopes.get(bit)
+        if scope is not None:
+            scopes.append(scope)
+        mask ^= 1 << bit
+    return scopes
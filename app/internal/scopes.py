@@ -1,34 +1,23 @@
+from psycopg import AsyncConnection
 from pydantic import BaseModel
+from app.internal import scope_index
 from app.internal.access import create_access
-from app.internal.db import apc, filterize
-
-
-async def create_scope(name: str, owner: str):
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            INSERT INTO scope
-            VALUES(%(name)s, %(owner)s)
-            """,
-            {"name": name, "owner": owner},
-        )
-    await create_access(owner, name)
-
-
-async def read_scope_owner(scope: str) -> str | None:
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            SELECT owner
-            FROM scope
-            WHERE name = %(scope)s
-            """,
-            {"scope": scope},
-        )
-        res = await c.fetchone()
-    if res is None:
-        return None
-    return res[0]
+from app.internal.db import PAGE_SIZE, filterize
+from app.internal.queries import queries
+
+
+async def create_scope(con: AsyncConnection, name: str, owner: str):
+    async with con.pipeline():
+        await queries.create_scope(con, name=name, owner=owner)
+        await create_access(con, owner, name)
+        await scope_index.bump_version(con)
+
+
+async def read_scope_owner(con: AsyncConnection, scope: str) -> str | None:
+    """
+    Locks the scope row until the request's transaction ends
+    """
+    return await queries.read_scope_owner(con, scope=scope)
 
 
 class ScopesList(BaseModel):
@@ -36,35 +25,42 @@ class ScopesList(BaseModel):
     owners: list[str]
 
 
-async def filter_scope(name: str, owner: str) -> ScopesList:
+async def filter_scope(con: AsyncConnection, name: str, owner: str) -> ScopesList:
     name = filterize(name)
     owner = filterize(owner)
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            SELECT *
-            FROM scope
-            WHERE name LIKE %(name)s
-                AND owner LIKE %(owner)s
-            LIMIT 30;
-            """,
-            {"name": name, "owner": owner},
-        )
-        res = await c.fetchall()
+    res = await queries.filter_scope(con, name=name, owner=owner)
     if len(res) == 0:
         return ScopesList(scopes=[], owners=[])
     scopes, owners = zip(*res)
     return ScopesList(scopes=scopes, owners=owners)  # type: ignore
 
 
-async def delete_scope(name: str):
-    async with apc() as c:
-        await c.execute(
-            """--sql
-            DELETE FROM scope
-            WHERE name = %(name)s
-            """,
-            {"name": name},
-        )
-        if c.rowcount == 0:
-            raise Exception(f"{name} not found!")
+class ScopeRow(BaseModel):
+    name: str
+    owner: str | None
+
+
+class ScopePage(BaseModel):
+    scopes: list[ScopeRow]
+    after: str | None
+
+
+async def page_scopes(con: AsyncConnection, name: str, after: str) -> ScopePage:
+    """
+    Keyset pagination on name, after is the last name of the previous page
+    """
+    rows = await queries.page_scopes(
+        con, name=filterize(name), after=after, limit=PAGE_SIZE + 1
+    )
+    scopes = [ScopeRow(name=name, owner=owner) for name, owner in rows]
+    if len(scopes) <= PAGE_SIZE:
+        return ScopePage(scopes=scopes, after=None)
+    scopes = scopes[:PAGE_SIZE]
+    return ScopePage(scopes=scopes, after=scopes[-1].name)
+
+
+async def delete_scope(con: AsyncConnection, name: str):
+    rowcount = await queries.delete_scope(con, name=name)
+    if rowcount == 0:
+        raise Exception(f"{name} not found!")
+    await scope_index.bump_version(con)
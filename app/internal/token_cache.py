@@ -0,0 +1,66 @@
+import os
+from time import monotonic
+
+# reuse an issued token while more than this fraction of its lifetime remains,
+# unset disables reuse
+TOKEN_REUSE_FRACTION = (
+    float(os.environ["TOKEN_REUSE_FRACTION"])
+    if "TOKEN_REUSE_FRACTION" in os.environ
+    else None
+)
+if TOKEN_REUSE_FRACTION is not None and not 0 <= TOKEN_REUSE_FRACTION < 1:
+    # outside this range tokens would be reused past their exp
+    raise Exception("TOKEN_REUSE_FRACTION must be at least 0 and below 1")
+TOKEN_CACHE_SIZE = 10000
+
+TokenKey = tuple[str, frozenset[str], bool]
+
+# key -> (token, reuse until)
+tokens: dict[TokenKey, tuple[str, float]] = {}
+
+
+def token_key(client: str, scopes: list[str], compact: bool) -> TokenKey:
+    return (client, frozenset(scopes), compact)
+
+
+def get_token(client: str, scopes: list[str], compact: bool) -> str | None:
+    if TOKEN_REUSE_FRACTION is None:
+        return None
+    cached = tokens.get(token_key(client, scopes, compact))
+    if cached is None:
+        return None
+    token, reuse_until = cached
+    if monotonic() >= reuse_until:
+        return None
+    return token
+
+
+def put_token(
+    client: str, scopes: list[str], compact: bool, token: str, lifetime: float
+):
+    if TOKEN_REUSE_FRACTION is None:
+        return
+    if len(tokens) >= TOKEN_CACHE_SIZE:
+        # dicts keep insertion order, so this evicts the oldest token
+        del tokens[next(iter(tokens))]
+    key = token_key(client, scopes, compact)
+    tokens.pop(key, None)
+    reuse_until = monotonic() + lifetime * (1 - TOKEN_REUSE_FRACTION)
+    tokens[key] = (token, reuse_until)
+
+
+def forget_client(client: str):
+    """
+    After the client is disabled, deleted, has its key reset or its access changed
+    """
+    for key in [key for key in tokens if key[0] == client]:
+        del tokens[key]
+
+
+def forget_scope(scope: str):
+    for key in [key for key in tokens if scope in key[1]]:
+        del tokens[key]
+
+
+def clear():
+    tokens.clear()
@@ -1,23 +1,28 @@
 from dotenv import load_dotenv
-from fastapi.staticfiles import StaticFiles
 
 load_dotenv()
 
-from app.internal import db
+from app.internal import audit, db, scope_index
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 import app.internal.auth as auth
-from app.routers import api, frontend
+from app.routers import api, frontend, health
+from app.static_files import STATIC_DIR, CachedStaticFiles
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    auth.update_private_key()
-    auth.update_public_key()
-    await db.pool.open()
+    if auth.keys_loaded_at is None:
+        auth.update_keys()
+    await db.open_pools()
+    async with db.pool.connection() as con:
+        await scope_index.update_scope_index(con)
+    auth.warmup()
+    audit.start()
     yield
 
-    await db.pool.close()
+    await audit.stop()
+    await db.close_pools()
 
 
 tags_metadata = [
@@ -37,13 +42,26 @@ tags_metadata = [
         "name": "access",
         "description": "Access defines a scope a client has access to",
     },
+    {
+        "name": "queries",
+        "description": "Call counts and time spent per named SQL query",
+    },
+    {
+        "name": "audit",
+        "description": "Record of logins and changes to clients, scopes and access",
+    },
+    {
+        "name": "health",
+        "description": "Liveness and readiness probes for the orchestrator",
+    },
     {"name": "login", "description": "frontend form to log in"},
     {"name": "console", "description": "admin console"},
 ]
 
 app = FastAPI(lifespan=lifespan, title="AuthWolfey", openapi_tags=tags_metadata)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 
 app.include_router(api.router)
 app.include_router(frontend.router)
+app.include_router(health.router)
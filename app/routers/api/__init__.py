@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from . import token, clients, scopes, access
+from . import token, clients, scopes, access, queries, audit
 
 router = APIRouter(
     prefix="/api",
@@ -10,3 +10,5 @@ router.include_router(token.router)
 router.include_router(clients.router)
 router.include_router(scopes.router)
 router.include_router(access.router)
+router.include_router(queries.router)
+router.include_router(audit.router)
@@ -1,6 +1,13 @@
-from fastapi import APIRouter, HTTPException, status
-from app.internal import access
-from app.dependencies import AdminDep, BasicAuthDep, StrForm, try_grant_access
+from fastapi import APIRouter, HTTPException, Response, status
+from app.internal import access, audit, db, token_cache
+from app.dependencies import (
+    AdminDep,
+    BasicAuthDep,
+    ReadDBDep,
+    StrForm,
+    WriteDBDep,
+    try_grant_access,
+)
 
 router = APIRouter(
     prefix="/access",
@@ -9,15 +16,24 @@ router = APIRouter(
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def create_access(clientname: StrForm, scope: StrForm, client: AdminDep):
+async def create_access(
+    clientname: StrForm,
+    scope: StrForm,
+    client: AdminDep,
+    con: WriteDBDep,
+    response: Response,
+):
     try_grant_access(client, scope)
     try:
-        await access.create_access(clientname, scope)
+        await access.create_access(con, clientname, scope)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e),
         )
+    await db.commit(con, response)
+    token_cache.forget_client(clientname)
+    audit.record(client.clientname, audit.Action.GRANT_ACCESS, clientname, scope)
     return {
         "scope": scope,
         "new_client": clientname,
@@ -27,25 +43,37 @@ async def create_access(clientname: StrForm, scope: StrForm, client: AdminDep):
 
 @router.get("", response_model=access.AccessList)
 async def read_access(
-    client: BasicAuthDep, client_filter: str = "", scope_filter: str = ""
+    client: BasicAuthDep,
+    con: ReadDBDep,
+    client_filter: str = "",
+    scope_filter: str = "",
 ):
-    return await access.filter_access(client_filter, scope_filter)
+    return await access.filter_access(con, client_filter, scope_filter)
 
 
 @router.delete("")
-async def delete_access(clientname: StrForm, scope: StrForm, client: AdminDep):
-    is_subject_admin = await access.check_access(clientname, "admin")
+async def delete_access(
+    clientname: StrForm,
+    scope: StrForm,
+    client: AdminDep,
+    con: WriteDBDep,
+    response: Response,
+):
+    is_subject_admin = await access.check_access(con, clientname, "admin")
     if is_subject_admin and not client.is_chad():
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only CHADs can delete admin access",
         )
     try:
-        await access.delete_access(client=clientname, scope=scope)
+        await access.delete_access(con, client=clientname, scope=scope)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
 
+    await db.commit(con, response)
+    token_cache.forget_client(clientname)
+    audit.record(client.clientname, audit.Action.REVOKE_ACCESS, clientname, scope)
     return {"client": clientname, "scope": scope, "caller": client.clientname}
@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from app.internal import audit
+from app.dependencies import AdminDep, CHADep, ReadDBDep
+
+router = APIRouter(
+    prefix="/audit",
+    tags=["audit"],
+)
+
+EPOCH = datetime.fromtimestamp(0, tz=timezone.utc)
+
+
+@router.get("")
+async def read_audit(
+    client: AdminDep,
+    con: ReadDBDep,
+    actor_filter: str = "",
+    action_filter: str = "",
+    subject_filter: str = "",
+    since: datetime = EPOCH,
+    limit: int = 10000,
+):
+    """
+    Streams newline delimited JSON entries, oldest first
+    """
+    entries = audit.stream_audit(
+        con, actor_filter, action_filter, subject_filter, since, limit
+    )
+    return StreamingResponse(entries, media_type="application/x-ndjson")
+
+
+@router.get("/stats", response_model=audit.AuditStats)
+def read_audit_stats(client: CHADep):
+    return audit.stats
@@ -1,7 +1,15 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
 from pydantic import BaseModel
-from app.internal import clients
-from app.dependencies import AdminDep, BasicAuthDep, BoolForm, StrForm, try_edit_user
+from app.internal import audit, clients, db, token_cache
+from app.dependencies import (
+    AdminDep,
+    BasicAuthDep,
+    BoolForm,
+    ReadDBDep,
+    StrForm,
+    WriteDBDep,
+    try_edit_user,
+)
 
 router = APIRouter(
     prefix="/clients",
@@ -10,11 +18,15 @@ router = APIRouter(
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def create_client(new_client_name: StrForm, client: AdminDep):
+async def create_client(
+    new_client_name: StrForm, client: AdminDep, con: WriteDBDep, response: Response
+):
     try:
-        key = await clients.create_client(new_client_name)
+        key = await clients.create_client(con, new_client_name)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    await db.commit(con, response)
+    audit.record(client.clientname, audit.Action.CREATE_CLIENT, new_client_name)
     return {"client": new_client_name, "key": key, "caller": client.clientname}
 
 
@@ -29,8 +41,8 @@ class clientInfo(BaseModel):
 
 
 @router.get("/{clientname}", response_model=clientInfo)
-async def read_client(clientname: str, client: BasicAuthDep):
-    res = await clients.read_client(clientname)
+async def read_client(clientname: str, client: BasicAuthDep, con: ReadDBDep):
+    res = await clients.read_client(con, clientname)
     if res is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"{clientname} not found"
@@ -40,43 +52,65 @@ async def read_client(clientname: str, client: BasicAuthDep):
 
 @router.get("", response_model=list[str])
 async def read_clients(
-    client: BasicAuthDep, clientname_filter: str = "", disabled: bool = False
+    client: BasicAuthDep,
+    con: ReadDBDep,
+    clientname_filter: str = "",
+    disabled: bool = False,
 ):
-    return await clients.filter_clients(clientname_filter, disabled)
+    return await clients.filter_clients(con, clientname_filter, disabled)
 
 
 @router.put("/{clientname}/disable")
-async def update_client_disabled(subject: str, disabled: BoolForm, admin: AdminDep):
-    await try_edit_user(subject, admin)
+async def update_client_disabled(
+    subject: str,
+    disabled: BoolForm,
+    admin: AdminDep,
+    con: WriteDBDep,
+    response: Response,
+):
+    await try_edit_user(con, subject, admin)
     try:
-        await clients.set_disabled_client(subject, disabled)
+        await clients.set_disabled_client(con, subject, disabled)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
 
+    await db.commit(con, response)
+    token_cache.forget_client(subject)
+    audit.record(admin.clientname, audit.Action.SET_DISABLED, subject, str(disabled))
     return {"subject": subject, "disabled": disabled, "caller": admin.clientname}
 
 
 @router.put("/{clientname}/resetkey")
-async def update_client_key(sub: str, admin: AdminDep):
-    await try_edit_user(sub, admin)
+async def update_client_key(
+    sub: str, admin: AdminDep, con: WriteDBDep, response: Response
+):
+    await try_edit_user(con, sub, admin)
     try:
-        key = await clients.reset_client_key(sub)
+        key = await clients.reset_client_key(con, sub)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    await db.commit(con, response)
+    token_cache.forget_client(sub)
+    audit.record(admin.clientname, audit.Action.RESET_KEY, sub)
     return key
 
 
 @router.delete("")
-async def delete_client(sub: StrForm, admin: AdminDep):
-    await try_edit_user(sub, admin)
+async def delete_client(
+    sub: StrForm, admin: AdminDep, con: WriteDBDep, response: Response
+):
+    await try_edit_user(con, sub, admin)
     try:
-        await clients.delete_client(sub)
+        await clients.delete_client(con, sub)
     except:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="client not found"
         )
 
+    await db.commit(con, response)
+    token_cache.forget_client(sub)
+    audit.record(admin.clientname, audit.Action.DELETE_CLIENT, sub)
     return {"client": sub, "caller": admin.clientname}
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from app.internal import queries
+from app.dependencies import CHADep
+
+router = APIRouter(
+    prefix="/queries",
+    tags=["queries"],
+)
+
+
+@router.get("/stats", response_model=dict[str, queries.QueryStats])
+def read_query_stats(client: CHADep):
+    return queries.stats
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, HTTPException, status
-from app.internal import scopes
-from app.dependencies import AdminDep, BasicAuthDep, StrForm
+from fastapi import APIRouter, HTTPException, Response, status
+from app.internal import audit, db, scope_index, scopes, token_cache
+from app.dependencies import AdminDep, BasicAuthDep, ReadDBDep, StrForm, WriteDBDep
 
 router = APIRouter(
     prefix="/scopes",
@@ -9,39 +9,62 @@ router = APIRouter(
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def create_scope(name: StrForm, admin: AdminDep):
+async def create_scope(
+    name: StrForm, admin: AdminDep, con: WriteDBDep, response: Response
+):
     try:
-        await scopes.create_scope(name, admin.clientname)
+        await scopes.create_scope(con, name, admin.clientname)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e),
         )
 
+    await db.commit(con, response)
+    await scope_index.update_scope_index(con)
+    audit.record(admin.clientname, audit.Action.CREATE_SCOPE, name)
     return {"scope": name, "caller": admin.clientname}
 
 
 @router.get("", response_model=scopes.ScopesList)
 async def read_scopes(
-    client: BasicAuthDep, scope_filter: str = "", owner_filter: str = ""
+    client: BasicAuthDep, con: ReadDBDep, scope_filter: str = "", owner_filter: str = ""
 ):
-    return await scopes.filter_scope(scope_filter, owner_filter)
+    return await scopes.filter_scope(con, scope_filter, owner_filter)
+
+
+@router.get("/index", response_model=scope_index.ScopeIndex)
+async def read_scope_index(min_version: int = 0):
+    """
+    Bit positions used by compact tokens, published so verifiers can decode them.
+    Public on purpose like /api/token/key, verifiers hold no credentials and
+    scope names are already readable in every list token's "aud".
+    Pass a token's "sv" as min_version to get an index that can decode it
+    """
+    await scope_index.refresh_scope_index(min_version)
+    return scope_index.get_scope_index()
 
 
 @router.delete("")
-async def delete_scope(scope: StrForm, client: AdminDep):
-    owner = await scopes.read_scope_owner(scope)
+async def delete_scope(
+    scope: StrForm, client: AdminDep, con: WriteDBDep, response: Response
+):
+    owner = await scopes.read_scope_owner(con, scope)
     if owner != client.clientname and not client.is_chad():
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You must be the owner or a CHAD to delete this scope",
         )
     try:
-        await scopes.delete_scope(scope)
+        await scopes.delete_scope(con, scope)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e),
         )
 
+    await db.commit(con, response)
+    await scope_index.update_scope_index(con)
+    token_cache.forget_scope(scope)
+    audit.record(client.clientname, audit.Action.DELETE_SCOPE, scope)
     return {"scope": scope, "caller": client.clientname}
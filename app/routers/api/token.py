@@ -1,8 +1,9 @@
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
+from app.dependencies import BoolForm, DBDep
 from app.internal import auth
 
 router = APIRouter(
@@ -17,8 +18,12 @@ class Token(BaseModel):
 
 
 @router.post("")
-async def create_token(form: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    login_result = await auth.login(form)
+async def create_token(
+    form: Annotated[OAuth2PasswordRequestForm, Depends()],
+    con: DBDep,
+    compact: BoolForm = False,
+):
+    login_result = await auth.login(con, form, compact)
     if not isinstance(login_result, str):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,3 +31,22 @@ async def create_token(form: Annotated[OAuth2PasswordRequestForm, Depends()]):
             headers={"WWW-Authenticate": "Bearer"},
         )
     return Token(access_token=login_result, token_type="bearer")
+
+
+class PublicKey(BaseModel):
+    issuer: str
+    algorithm: str
+    public_key: str
+
+
+@router.get("/key", response_model=PublicKey)
+def read_public_key(response: Response):
+    """
+    For verifying tokens offline, see wolfeyauth.Verifier
+    """
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return PublicKey(
+        issuer=auth.AUTH_ISSUER,
+        algorithm="RS256",
+        public_key=auth.public_key.decode(),
+    )
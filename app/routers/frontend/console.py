@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Request
-from app.dependencies import BrowserBasicAuthDep
+from app.dependencies import BrowserBasicAuthDep, ReadDBDep
+from app.internal import access, clients, scopes
 from app.routers.frontend.templates import templates
 
 router = APIRouter(tags=["console"])
@@ -7,6 +8,49 @@ router = APIRouter(tags=["console"])
 
 @router.get("/")
 async def index(request: Request, client: BrowserBasicAuthDep):
+    """
+    Only the shell, htmx loads each table from the fragment endpoints below
+    """
     ctx = client.model_dump()
     ctx["request"] = request
     return templates.TemplateResponse("console.html", ctx)
+
+
+@router.get("/console/clients")
+async def clients_rows(
+    request: Request,
+    client: BrowserBasicAuthDep,
+    con: ReadDBDep,
+    name_filter: str = "",
+    after: str = "",
+):
+    page = await clients.page_clients(con, name_filter, after)
+    ctx = {"request": request, "clients_page": page, "name_filter": name_filter}
+    return templates.TemplateResponse("console.html", ctx, block_name="clients_rows")
+
+
+@router.get("/console/scopes")
+async def scopes_rows(
+    request: Request,
+    client: BrowserBasicAuthDep,
+    con: ReadDBDep,
+    name_filter: str = "",
+    after: str = "",
+):
+    page = await scopes.page_scopes(con, name_filter, after)
+    ctx = {"request": request, "scopes_page": page, "name_filter": name_filter}
+    return templates.TemplateResponse("console.html", ctx, block_name="scopes_rows")
+
+
+@router.get("/console/access")
+async def access_rows(
+    request: Request,
+    client: BrowserBasicAuthDep,
+    con: ReadDBDep,
+    client_filter: str = "",
+    after_client: str = "",
+    after_scope: str = "",
+):
+    page = await access.page_access(con, client_filter, after_client, after_scope)
+    ctx = {"request": request, "access_page": page, "client_filter": client_filter}
+    return templates.TemplateResponse("console.html", ctx, block_name="access_rows")
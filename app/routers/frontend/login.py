@@ -2,7 +2,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from app.dependencies import add_reserved
+from app.dependencies import DBDep, add_reserved
 from app.internal import auth
 from app.internal.auth import RUNTIME, TOKEN_LIFETIME_SECONDS, Runtime
 from app.routers.frontend.templates import templates
@@ -27,9 +27,10 @@ async def submit_creds(
     request: Request,
     response: Response,
     form: Annotated[OAuth2PasswordRequestForm, Depends()],
+    con: DBDep,
 ):
-    await add_reserved(form)
-    login_result = await auth.login(form)
+    await add_reserved(con, form)
+    login_result = await auth.login(con, form, compact=True)
     if not isinstance(login_result, str):
         return templates.TemplateResponse(
             "login.html",
@@ -1,3 +1,5 @@
 from jinja2_fragments.fastapi import Jinja2Blocks
+from app.static_files import static_url
 
 templates = Jinja2Blocks(directory="app/templates")
+templates.env.globals["static_url"] = static_url
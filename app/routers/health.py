@@ -0,0 +1,19 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from app.internal import health
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/healthz")
+def liveness():
+    return {"alive": True}
+
+
+@router.get("/readyz", response_model=health.Readiness)
+async def readiness():
+    res = await health.readiness()
+    status_code = (
+        status.HTTP_200_OK if res.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    return JSONResponse(res.model_dump(mode="json"), status_code=status_code)
@@ -0,0 +1,120 @@
+"""
+Fingerprinted, precompressed static assets
+
+python -m app.static_files writes the .gz and .br siblings,
+the Dockerfile runs it at build time
+"""
+
+import gzip
+from hashlib import sha256
+from mimetypes import guess_type
+import os
+from pathlib import Path
+from urllib.parse import parse_qs
+import brotli
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+STATIC_DIR = Path("app/static")
+# preferred first
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def is_variant(path: Path) -> bool:
+    return path.suffix in ENCODINGS.values()
+
+
+def read_fingerprints() -> dict[str, str]:
+    fingerprints = {}
+    for path in STATIC_DIR.rglob("*"):
+        if path.is_file() and not is_variant(path):
+            digest = sha256(path.read_bytes()).hexdigest()[:12]
+            fingerprints[path.relative_to(STATIC_DIR).as_posix()] = digest
+    return fingerprints
+
+
+fingerprints = read_fingerprints()
+
+
+def static_url(path: str) -> str:
+    """
+    Jinja global, the ?v= fingerprint changes with the file so it can be cached forever
+    """
+    return f"/static/{path}?v={fingerprints[path]}"
+
+
+def accepted_encodings(scope: Scope) -> set[str]:
+    accept = Headers(scope=scope).get("accept-encoding", "")
+    return {encoding.split(";")[0].strip() for encoding in accept.split(",")}
+
+
+class CachedStaticFiles(StaticFiles):
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = self.encoded_response(full_path, stat_result, scope, status_code)
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+
+        path = Path(full_path).relative_to(STATIC_DIR.resolve()).as_posix()
+        version = parse_qs(scope["query_string"].decode()).get("v", [None])[0]
+        if version is not None and version == fingerprints.get(path):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def encoded_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int,
+    ) -> Response | None:
+        """
+        A .br or .gz older than its source is stale, the source is served instead
+        """
+        accepted = accepted_encodings(scope)
+        for encoding, suffix in ENCODINGS.items():
+            if encoding not in accepted:
+                continue
+            variant = f"{full_path}{suffix}"
+            try:
+                variant_stat = os.stat(variant)
+            except FileNotFoundError:
+                continue
+            if variant_stat.st_mtime < stat_result.st_mtime:
+                continue
+            response = FileResponse(
+                variant,
+                status_code=status_code,
+                stat_result=variant_stat,
+                method=scope["method"],
+                media_type=guess_type(full_path)[0],
+                headers={"Content-Encoding": encoding},
+            )
+            if self.is_not_modified(response.headers, Headers(scope=scope)):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
+
+
+def precompress():
+    for path in STATIC_DIR.rglob("*"):
+        if not path.is_file() or is_variant(path):
+            continue
+        content = path.read_bytes()
+        Path(f"{path}.gz").write_bytes(gzip.compress(content, 9))
+        Path(f"{path}.br").write_bytes(brotli.compress(content))
+
+
+if __name__ == "__main__":
+    precompress()
@@ -0,0 +1,65 @@
+"""
+Token size and verify time, list ("aud") vs compact ("scp") tokens
+
+python -m benchmarks.token_format
+"""
+import os
+import random
+from timeit import timeit
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/bench")
+os.environ.setdefault("AUTH_ISSUER", "bench")
+os.environ.setdefault("PRIVATE_KEY_PATH", "")
+os.environ.setdefault("PUBLIC_KEY_PATH", "")
+os.environ.setdefault("RUNTIME", "TEST")
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from app.internal import auth, scope_index
+
+INDEX_SIZE = 2000
+GRANT_COUNTS = [1, 10, 100, 500, 1000]
+VERIFY_RUNS = 500
+
+
+def load_keys():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    auth.private_key = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    auth.public_key = key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+
+
+def load_index():
+    names = [f"service_{i:04}.read_write" for i in range(1, INDEX_SIZE + 1)]
+    scope_index.scope_bits = {name: i for i, name in enumerate(names, start=1)}
+    scope_index.bit_scopes = {i: name for name, i in scope_index.scope_bits.items()}
+    scope_index.version = INDEX_SIZE
+    return names
+
+
+def main():
+    load_keys()
+    names = load_index()
+    print(f"{'grants':>6} {'format':>8} {'bytes':>7} {'verify us':>10}")
+    for count in GRANT_COUNTS:
+        # random grants compress worse than a contiguous run of bits
+        scopes = random.Random(count).sample(names, count)
+        required = [scopes[-1]]
+        for compact in (False, True):
+            token = auth.create_token("bench", scopes, compact)
+            seconds = timeit(
+                lambda: auth.authorize_token(token, required), number=VERIFY_RUNS
+            )
+            label = "compact" if compact else "list"
+            micros = seconds / VERIFY_RUNS * 1e6
+            print(f"{count:>6} {label:>8} {len(token):>7} {micros:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
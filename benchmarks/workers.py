@@ -0,0 +1,100 @@
+"""
+Throughput vs gunicorn worker count
+
+Needs the usual .env and a migrated database.
+"me" hammers GET /api/clients/me (RS256 verify),
+"token" hammers POST /api/token (bcrypt + RS256 sign) as BENCH_CLIENT / BENCH_KEY
+
+python -m benchmarks.workers me 1 2 4 8
+"""
+import http.client
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+from urllib.parse import urlencode
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HOST = "127.0.0.1"
+PORT = 18080
+CONCURRENCY = 32
+DURATION_SECONDS = 10
+
+
+def bench_request(mode: str) -> tuple[str, str, bytes | None, dict[str, str]]:
+    if mode == "me":
+        from app.internal import auth
+
+        auth.update_keys()
+        token = auth.create_token("bench", ["basic"])
+        return "GET", "/api/clients/me", None, {"Authorization": f"Bearer {token}"}
+
+    form = {
+        "username": os.environ["BENCH_CLIENT"],
+        "password": os.environ["BENCH_KEY"],
+        "scope": "basic",
+    }
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    return "POST", "/api/token", urlencode(form).encode(), headers
+
+
+def hammer(request: tuple[str, str, bytes | None, dict[str, str]]) -> int:
+    method, path, body, headers = request
+    con = http.client.HTTPConnection(HOST, PORT)
+    done = 0
+    deadline = time.monotonic() + DURATION_SECONDS
+    while time.monotonic() < deadline:
+        con.request(method, path, body, headers)
+        res = con.getresponse()
+        res.read()
+        if res.status != 200:
+            raise Exception(f"{path} returned {res.status}")
+        done += 1
+    con.close()
+    return done
+
+
+def wait_ready():
+    while True:
+        try:
+            con = http.client.HTTPConnection(HOST, PORT, timeout=1)
+            con.request("GET", "/login")
+            con.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+
+
+def run(workers: int, request) -> float:
+    env = os.environ | {"WEB_CONCURRENCY": str(workers), "PORT": str(PORT)}
+    server = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready()
+        with Pool(CONCURRENCY) as pool:
+            done = sum(pool.map(hammer, [request] * CONCURRENCY))
+    finally:
+        server.terminate()
+        server.wait()
+    return done / DURATION_SECONDS
+
+
+def main():
+    mode = sys.argv[1]
+    worker_counts = [int(n) for n in sys.argv[2:]] or [1, 2, 4]
+    request = bench_request(mode)
+    print(f"{'workers':>7} {'req/s':>9}")
+    for workers in worker_counts:
+        print(f"{workers:>7} {run(workers, request):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
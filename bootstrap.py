@@ -1,16 +1,16 @@
 import asyncio
-from app.internal import clients, db
-import app.internal.auth as auth
+from app.internal import clients, db, scopes
 
 
 async def main():
     await db.pool.open()
     try:
-        wolfey_key = await clients.create_client("wolfey")
-        print("key:", wolfey_key)
-        await auth.create_scope("basic", "wolfey")
-        await auth.create_scope("admin", "wolfey")
-        await auth.create_scope("CHAD", "wolfey")
+        async with db.pool.connection() as con:
+            wolfey_key = await clients.create_client(con, "wolfey")
+            print("key:", wolfey_key)
+            await scopes.create_scope(con, "basic", "wolfey")
+            await scopes.create_scope(con, "admin", "wolfey")
+            await scopes.create_scope(con, "CHAD", "wolfey")
     except:
         print("Already bootstrapped! Moving on...")
 
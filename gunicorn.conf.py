@@ -0,0 +1,51 @@
+"""
+Production entry point, gunicorn -c gunicorn.conf.py
+
+The master imports the app and loads the keys once, then forks the workers.
+Each worker's lifespan fills its pool to min_size and warms up RS256 + bcrypt
+before it accepts connections.
+
+kill -HUP <master pid> reloads the keys and replaces the workers gracefully,
+old workers finish their in flight requests before exiting.
+"""
+from math import ceil
+import os
+
+
+def cpu_count() -> int:
+    """
+    os.cpu_count() is the host's in a container, the cgroup quota is what we get
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            return max(1, ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0))
+
+
+wsgi_app = "app.main:app"
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count()))
+# Each worker has its own pool (and replica pool), together they stay under
+# DB_MAX_CONNECTIONS, keep it below the server's max_connections.
+# Set before the app is imported so app.internal.db picks them up
+DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", 80))
+os.environ.setdefault("DB_POOL_MAX_SIZE", str(max(1, DB_MAX_CONNECTIONS // workers)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = 30
+
+
+def on_starting(server):
+    from app.internal import auth
+
+    auth.update_keys()
+
+
+def on_reload(server):
+    from app.internal import auth
+
+    auth.update_keys()
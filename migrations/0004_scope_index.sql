@@ -0,0 +1,5 @@
+-- +migrate Up
+ALTER TABLE scope
+ADD COLUMN idx SERIAL UNIQUE;
+-- +migrate Down
+ALTER TABLE scope DROP COLUMN idx;
\ No newline at end of file
@@ -0,0 +1,11 @@
+-- +migrate Up
+CREATE TABLE audit (
+	at TIMESTAMPTZ NOT NULL,
+	actor TEXT NOT NULL,
+	action VARCHAR(32) NOT NULL,
+	subject TEXT NOT NULL,
+	detail TEXT NOT NULL
+);
+CREATE INDEX audit_at ON audit (at);
+-- +migrate Down
+DROP TABLE audit;
\ No newline at end of file
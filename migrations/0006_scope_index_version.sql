@@ -0,0 +1,9 @@
+-- +migrate Up
+CREATE TABLE scope_index_version (
+	version BIGINT NOT NULL
+);
+INSERT INTO scope_index_version
+SELECT COALESCE(MAX(idx), 0)
+FROM scope;
+-- +migrate Down
+DROP TABLE scope_index_version;
\ No newline at end of file
@@ -0,0 +1,36 @@
+-- name: create_access!
+INSERT INTO access
+VALUES(:clientname, :scopename);
+
+-- name: check_access$
+SELECT EXISTS (
+    SELECT 1
+    FROM access
+    WHERE clientname = :clientname
+        AND scopename = :scopename
+);
+
+-- name: read_access
+SELECT scopename
+FROM access
+WHERE clientname = :clientname;
+
+-- name: filter_access
+SELECT scopename, clientname
+FROM access
+WHERE LOWER(clientname) LIKE :client
+    AND LOWER(scopename) LIKE :scope
+LIMIT 30;
+
+-- name: delete_access!
+DELETE FROM access
+WHERE clientname = :clientname
+    AND scopename = :scopename;
+
+-- name: page_access
+SELECT clientname, scopename
+FROM access
+WHERE (clientname, scopename) > (:after_client, :after_scope)
+    AND LOWER(clientname) LIKE :client
+ORDER BY clientname, scopename
+LIMIT :limit;
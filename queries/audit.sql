@@ -0,0 +1,16 @@
+-- name: copy_audit#
+COPY audit (at, actor, action, subject, detail) FROM STDIN;
+
+-- name: insert_audit!
+INSERT INTO audit (at, actor, action, subject, detail)
+VALUES (:at, :actor, :action, :subject, :detail);
+
+-- name: filter_audit
+SELECT at, actor, action, subject, detail
+FROM audit
+WHERE LOWER(actor) LIKE :actor
+    AND LOWER(action) LIKE :action
+    AND LOWER(subject) LIKE :subject
+    AND at >= :since
+ORDER BY at
+LIMIT :limit;
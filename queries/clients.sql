@@ -0,0 +1,37 @@
+-- name: create_client!
+INSERT INTO client
+VALUES (:name, :hashedkey, DEFAULT);
+
+-- name: read_client^
+SELECT name, hashedkey, disabled
+FROM client
+WHERE name = :name;
+
+-- name: filter_clients
+SELECT name
+FROM client
+WHERE LOWER(name) LIKE :name
+AND disabled = :disabled
+LIMIT 30;
+
+-- name: update_disabled!
+UPDATE client
+SET disabled = :disabled
+WHERE name = :name;
+
+-- name: update_hashedkey!
+UPDATE client
+SET hashedkey = :hashedkey
+WHERE name = :name;
+
+-- name: delete_client!
+DELETE FROM client
+WHERE name = :name;
+
+-- name: page_clients
+SELECT name, disabled
+FROM client
+WHERE name > :after
+    AND LOWER(name) LIKE :name
+ORDER BY name
+LIMIT :limit;
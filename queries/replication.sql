@@ -0,0 +1,7 @@
+-- name: current_wal_lsn$
+SELECT CAST(pg_current_wal_lsn() AS TEXT);
+
+-- name: replayed_lsn$
+-- Replay position is NULL when the server isn't a standby,
+-- a NULL lsn means there is nothing to wait for
+SELECT COALESCE(pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn), TRUE);
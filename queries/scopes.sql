@@ -0,0 +1,43 @@
+-- name: create_scope!
+INSERT INTO scope
+VALUES(:name, :owner);
+
+-- name: read_scope_owner$
+-- Locks the scope row until the transaction ends
+SELECT owner
+FROM scope
+WHERE name = :scope
+FOR UPDATE;
+
+-- name: filter_scope
+SELECT name, owner
+FROM scope
+WHERE name LIKE :name
+    AND owner LIKE :owner
+LIMIT 30;
+
+-- name: delete_scope!
+DELETE FROM scope
+WHERE name = :name;
+
+-- name: bump_scope_index_version$
+-- The row lock holds other scope changes until this transaction ends,
+-- so versions follow commit order
+UPDATE scope_index_version
+SET version = version + 1
+RETURNING version;
+
+-- name: read_scope_index
+-- One statement, so the version and the scopes come from one snapshot
+SELECT v.version, s.idx, s.name
+FROM scope_index_version v
+    LEFT JOIN scope s ON TRUE
+ORDER BY s.idx;
+
+-- name: page_scopes
+SELECT name, owner
+FROM scope
+WHERE name > :after
+    AND LOWER(name) LIKE :name
+ORDER BY name
+LIMIT :limit;
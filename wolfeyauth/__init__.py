@@ -0,0 +1,3 @@
+from wolfeyauth.verify import Client, Verifier
+
+__all__ = ["Client", "Verifier"]
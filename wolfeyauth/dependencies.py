@@ -0,0 +1,28 @@
+"""
+FastAPI Security dependency, the counterpart of app.dependencies.authorize_client_api
+
+authorize = authorizer(Verifier("https://auth.example.com", issuer="auth.example.com"))
+BasicAuthDep = Annotated[Client, Security(authorize, scopes=["basic"])]
+"""
+from typing import Annotated
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer, SecurityScopes
+from wolfeyauth.verify import Client, Verifier
+
+
+def authorizer(verifier: Verifier):
+    oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{verifier.auth_url}/api/token")
+
+    def authorize_client_api(
+        security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)]
+    ) -> Client:
+        try:
+            return verifier.authorize(token, security_scopes.scopes)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=str(e),
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+    return authorize_client_api
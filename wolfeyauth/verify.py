@@ -0,0 +1,228 @@
+"""
+Offline token verification for services that trust the auth server.
+Only needs PyJWT + cryptography, the public key and scope index are
+fetched from the auth server and cached
+"""
+from base64 import urlsafe_b64decode
+from dataclasses import dataclass
+import json
+import threading
+from time import monotonic, time
+from urllib.request import urlopen
+import zlib
+import jwt
+
+# past this the key is refetched, if that fails the last good key is kept
+KEY_TTL_SECONDS = 300
+# on a bad signature the key is refetched, at most this often, to follow key rotation
+KEY_REFRESH_MIN_SECONDS = 30
+# same as the server's SCOPE_INDEX_TTL_SECONDS / SCOPE_INDEX_MIN_REFRESH_SECONDS
+INDEX_TTL_SECONDS = 60
+INDEX_REFRESH_MIN_SECONDS = 0.5
+RESULT_CACHE_SIZE = 10000
+
+
+@dataclass
+class Client:
+    clientname: str
+    scopes: list[str]
+
+    def has_scope(self, scope: str):
+        return scope in self.scopes
+
+    def is_chad(self):
+        return self.has_scope("CHAD")
+
+    def is_admin(self):
+        return self.has_scope("admin")
+
+
+@dataclass
+class Verified:
+    client: Client
+    expires: float
+    compact: bool
+
+
+def decode_mask(encoded: str) -> int:
+    """
+    Mirrors app.internal.scope_index.decode_mask
+    """
+    padded = encoded + "=" * (-len(encoded) % 4)
+    return int.from_bytes(zlib.decompress(urlsafe_b64decode(padded)), "little")
+
+
+def mask_scopes(mask: int, bit_scopes: dict[int, str]) -> list[str]:
+    scopes = []
+    while mask:
+        bit = mask.bit_length() - 1
+        scope = bit_scopes.get(bit)
+        if scope is not None:
+            scopes.append(scope)
+        mask ^= 1 << bit
+    return scopes
+
+
+class Verifier:
+    """
+    verifier = Verifier("https://auth.example.com", issuer="auth.example.com")
+    client = verifier.authorize(token, ["my_scope"])
+    """
+
+    def __init__(self, auth_url: str, issuer: str):
+        self.auth_url = auth_url.rstrip("/")
+        self.issuer = issuer
+        self.public_key: bytes | None = None
+        self.key_fetched = float("-inf")
+        self.bit_scopes: dict[int, str] = {}
+        self.index_version = -1
+        self.index_fetched = float("-inf")
+        self.index_retry_at = float("-inf")
+        # token -> verified claims, entries are dropped once the token expires
+        self.results: dict[str, Verified] = {}
+        # sync FastAPI dependencies run in a threadpool. Fetches have their own
+        # lock so one slow fetch doesn't hold up cached results
+        self.results_lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+
+    def fetch_json(self, path: str):
+        with urlopen(f"{self.auth_url}{path}", timeout=5) as res:
+            return json.load(res)
+
+    def update_public_key(self):
+        res = self.fetch_json("/api/token/key")
+        self.public_key = res["public_key"].encode()
+        self.key_fetched = monotonic()
+
+    def key_stale(self) -> bool:
+        return monotonic() - self.key_fetched > KEY_TTL_SECONDS
+
+    def get_public_key(self) -> bytes:
+        if self.public_key is not None and not self.key_stale():
+            return self.public_key
+        with self.refresh_lock:
+            if self.public_key is None:
+                self.update_public_key()
+            elif self.key_stale():
+                try:
+                    self.update_public_key()
+                except Exception:
+                    # auth server down or slow, keep the last good key
+                    # and try again after KEY_REFRESH_MIN_SECONDS
+                    retry_at = monotonic() + KEY_REFRESH_MIN_SECONDS
+                    self.key_fetched = retry_at - KEY_TTL_SECONDS
+        return self.public_key  # type: ignore
+
+    def refetch_public_key(self, bad_key: bytes) -> bytes | None:
+        """
+        After a bad signature, to follow key rotation.
+        None if bad_key is still current and was fetched too recently
+        """
+        with self.refresh_lock:
+            if self.public_key != bad_key:
+                return self.public_key
+            if monotonic() - self.key_fetched < KEY_REFRESH_MIN_SECONDS:
+                return None
+            self.update_public_key()
+            return self.public_key
+
+    def update_scope_index(self, min_version: int):
+        res = self.fetch_json(f"/api/scopes/index?min_version={min_version}")
+        self.bit_scopes = {int(bit): scope for bit, scope in res["scopes"].items()}
+        self.index_version = res["version"]
+        self.index_fetched = monotonic()
+
+    def index_stale(self, min_version: int) -> bool:
+        now = monotonic()
+        if now < self.index_retry_at:
+            return False
+        if self.index_version < min_version:
+            return now - self.index_fetched >= INDEX_REFRESH_MIN_SECONDS
+        return now - self.index_fetched >= INDEX_TTL_SECONDS
+
+    def get_scope_index(self, min_version: int) -> dict[int, str]:
+        """
+        Refetched when older than min_version or INDEX_TTL_SECONDS,
+        at most every INDEX_REFRESH_MIN_SECONDS
+        """
+        if not self.index_stale(min_version):
+            return self.bit_scopes
+        with self.refresh_lock:
+            if self.index_stale(min_version):
+                try:
+                    self.update_scope_index(min_version)
+                except Exception:
+                    if self.index_version < 0:
+                        raise
+                    # keep the last good index
+                    self.index_retry_at = monotonic() + KEY_REFRESH_MIN_SECONDS
+        return self.bit_scopes
+
+    def decode(self, token: str, public_key: bytes, compact: bool) -> dict:
+        # aud is checked per call in authorize, the result is cached across scopes
+        options = {
+            "require": ["exp", "iss", "sub", "scp" if compact else "aud"],
+            "verify_aud": False,
+        }
+        return jwt.decode(
+            token,
+            public_key,
+            issuer=self.issuer,
+            algorithms=["RS256"],
+            options=options,
+        )
+
+    def verify(self, token: str) -> Verified:
+        header = jwt.get_unverified_header(token)
+        compact = "sv" in header
+        public_key = self.get_public_key()
+        try:
+            payload = self.decode(token, public_key, compact)
+        except jwt.InvalidSignatureError:
+            new_key = self.refetch_public_key(public_key)
+            if new_key is None:
+                raise
+            payload = self.decode(token, new_key, compact)
+
+        if compact:
+            bit_scopes = self.get_scope_index(header["sv"])
+            scopes = mask_scopes(decode_mask(payload["scp"]), bit_scopes)
+        else:
+            aud = payload["aud"]
+            scopes = [aud] if isinstance(aud, str) else aud
+
+        client = Client(clientname=payload["sub"], scopes=scopes)
+        return Verified(client=client, expires=payload["exp"], compact=compact)
+
+    def cached(self, token: str) -> Verified | None:
+        with self.results_lock:
+            verified = self.results.get(token)
+            if verified is not None and verified.expires <= time():
+                del self.results[token]
+                return None
+            return verified
+
+    def cache(self, token: str, verified: Verified):
+        with self.results_lock:
+            if len(self.results) >= RESULT_CACHE_SIZE:
+                now = time()
+                for cached in [t for t, v in self.results.items() if v.expires <= now]:
+                    del self.results[cached]
+            if len(self.results) >= RESULT_CACHE_SIZE:
+                del self.results[next(iter(self.results))]
+            self.results[token] = verified
+
+    def authorize(self, token: str, scopes: list[str]) -> Client:
+        """
+        Same rule as app.internal.auth.authorize_token for both token formats,
+        any one of the scopes is enough and an empty list never passes
+        """
+        verified = self.cached(token)
+        if verified is None:
+            verified = self.verify(token)
+            self.cache(token, verified)
+
+        has_scopes = verified.client.scopes
+        if not any(scope in has_scopes for scope in scopes):
+            raise Exception("Token is missing a required scope")
+        return verified.client